@@ -1,86 +1,134 @@
 from deep_translator import GoogleTranslator
+from deep_translator.exceptions import TooManyRequests
 import re
 import os
-import glob
 import argparse
 import time
+import sqlite3
+import hashlib
+import codecs
+import io
+import threading
+import functools
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
+# 预编译常用正则，避免逐行调用时重复查找缓存
+# 数字格式合并为一条正则：整数、小数（含欧式逗号小数）、科学计数法、以E/N结尾的数字、分数、空值或单独的符号
+_NUMERIC_RE = re.compile(r'^(?:[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][+-]?\d*|[nN])?|\d+/\d+|[+-]?)$')
+_ALPHA_RE = re.compile(r'[a-zA-Z]')
+# 文件路径：Windows 盘符路径、UNC 路径和 POSIX 绝对路径
+_PATH_RE = re.compile(r'^(?:[A-Za-z]:[\\/]|\\\\|/[A-Za-z])')
+
+# 可重试错误（网络错误和请求过于频繁）的关键字，合并为一条正则只扫描一次错误信息
+_NETWORK_ERROR_RE = re.compile(r'network|connection|timeout|ssl|handshake|keyboardinterrupt|too many requests|429', re.IGNORECASE)
+
+# 每个翻译线程复用自己的 GoogleTranslator 实例；实例在翻译时会改写自身的请求参数，不能跨线程共享
+_thread_local = threading.local()
+
+# 免费的 Google 翻译接口约限每秒 5 次请求，超出会返回 429；所有线程共用一个请求间隔，控制在每秒 4 次以内
+_MIN_REQUEST_INTERVAL = 0.25
+_rate_lock = threading.Lock()
+_next_request_time = 0.0
+
+# 块内文本之间的分隔符，选用翻译时会原样保留的字符，避免空行分隔被译文合并
+_SEP = "\n⸻SEP⸻\n"
+
+# 已识别的文件编码，分析和写回时共用，避免重复检测
+_ENCODING_CACHE = {}
+
+# 本地翻译缓存，跨文件、跨运行复用已翻译过的文本
+_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.trans_batch_cache.sqlite')
+
+# 数据文件中大量重复出现相同的数字单元格（0、1、-1、100 等），缓存判断结果
+@functools.lru_cache(maxsize=8192)
 def is_number_or_scientific(text):
     """检查文本是否为数字或科学计数法（以E或N结尾的数字）"""
-    text = text.strip()
-    
-    # 检查是否为空或只有符号
-    if not text or text in ['-', '+']:
-        return True
-    
-    # 检查是否为纯数字（包括负数）
-    if text.lstrip('-+').isdigit():
-        return True
-    
-    # 检查是否为小数（包括负数和使用逗号作为小数点的欧式格式）
-    try:
-        # 尝试解析标准小数格式
-        float(text)
-        return True
-    except ValueError:
-        try:
-            # 尝试解析欧式小数格式（逗号作为小数点）
-            float(text.replace(',', '.'))
-            return True
-        except ValueError:
-            pass
-    
-    # 检查是否为科学计数法（以E结尾）
-    if text.upper().endswith('E') or re.match(r'^[+-]?\d+\.?\d*E[+-]?\d*$', text.upper()):
-        return True
-    
-    # 检查是否为以E或N结尾的数字
-    if re.match(r'^[+-]?\d+[EN]$', text.upper()):
-        return True
-    
-    # 检查是否为分数格式（如 3/4）
-    if re.match(r'^\d+/\d+$', text):
-        return True
-        
-    return False
+    return bool(_NUMERIC_RE.match(text.strip()))
 
-def extract_translatable_content(file_path):
-    """提取文件中需要翻译的内容"""
+def _extract_from_lines(lines, file_path):
+    """从逐行迭代的文本中提取需要翻译的内容"""
     translatable_items = []
     
-    try:
-        # 尝试不同的编码
-        encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252']
-        content = None
+    for line_num, line in enumerate(lines):
+        original_line = line
+        line = line.strip()
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.readlines()
-                break
-            except UnicodeDecodeError:
-                continue
+        # 跳过空行、注释行和节标题
+        if not line or line.startswith(('#', '[', '//')):
+            continue
         
-        if content is None:
-            print(f"⚠️ 无法读取文件 {file_path}，跳过")
-            return []
+        # 整行不含英文字母时不可能有待翻译内容，一次正则扫描即可跳过，省去逐列拆分和判断
+        if not _ALPHA_RE.search(line):
+            continue
+        
+        key, eq, value = line.partition('=')
         
-        for line_num, line in enumerate(content):
-            original_line = line
-            line = line.strip()
+        # 查找等号分割的行
+        if eq:
+            value = value.strip()
+            
+            # 跳过空值、文件路径、数字和科学计数法
+            if (not value or 
+                _PATH_RE.match(value) or 
+                value.startswith('http') or 
+                is_number_or_scientific(value) or
+                len(value) < 2):
+                continue
             
-            # 跳过空行、注释行和节标题
-            if not line or line.startswith('#') or line.startswith('[') or line.startswith('//'):
+            # 跳过带有英文中括号的内容
+            if '[' in value and ']' in value:
                 continue
             
-            # 查找等号分割的行
-            if '=' in line:
-                key, value = line.split('=', 1)
+            # 只翻译包含字母的文本
+            if _ALPHA_RE.search(value):
+                translatable_items.append({
+                    'file_path': file_path,
+                    'line_num': line_num,
+                    'key': key.strip(),
+                    'value': value,
+                    'original_line': original_line,
+                    'type': 'key_value'
+                })
+        
+        # 处理分号分隔的数据（如CSV格式）
+        elif ';' in line:
+            parts = line.split(';')
+            # 检查所有列，但跳过所有数字
+            for col_index, part in enumerate(parts):
+                part = part.strip()
+                
+                # 跳过空值、数字、科学计数法和短文本
+                if (not part or 
+                    part == '-' or
+                    is_number_or_scientific(part) or
+                    len(part) < 2):
+                    continue
+                
+                # 跳过带有英文中括号的内容
+                if '[' in part and ']' in part:
+                    continue
+                
+                # 只翻译包含字母的文本（排除纯数字）
+                if _ALPHA_RE.search(part):
+                    translatable_items.append({
+                        'file_path': file_path,
+                        'line_num': line_num,
+                        'value': part,
+                        'original_line': original_line,
+                        'type': 'csv_cell',
+                        'column_index': col_index
+                    })
+        
+        else:
+            key, colon, value = line.partition(': ')
+            
+            # 查找冒号分割的行（没有等号的情况）
+            if colon:
                 value = value.strip()
                 
-                # 跳过空值、文件路径、数字和科学计数法
+                # 跳过空值、数字和科学计数法
                 if (not value or 
-                    value.startswith('C:\\') or 
                     is_number_or_scientific(value) or
                     len(value) < 2):
                     continue
@@ -90,81 +138,24 @@ def extract_translatable_content(file_path):
                     continue
                 
                 # 只翻译包含字母的文本
-                if re.search(r'[a-zA-Z]', value) and not value.startswith('http'):
+                if _ALPHA_RE.search(value):
                     translatable_items.append({
                         'file_path': file_path,
                         'line_num': line_num,
                         'key': key.strip(),
                         'value': value,
                         'original_line': original_line,
-                        'type': 'key_value'
+                        'type': 'colon_value'
                     })
             
-            # 处理分号分隔的数据（如CSV格式）
-            elif ';' in line:
-                parts = line.split(';')
-                # 检查所有列，但跳过所有数字
-                for col_index, part in enumerate(parts):
-                    part = part.strip()
-                    
-                    # 跳过空值、数字、科学计数法和短文本
-                    if (not part or 
-                        part == '-' or
-                        is_number_or_scientific(part) or
-                        len(part) < 2):
-                        continue
-                    
-                    # 跳过带有英文中括号的内容
-                    if '[' in part and ']' in part:
-                        continue
-                    
-                    # 只翻译包含字母的文本（排除纯数字）
-                    if re.search(r'[a-zA-Z]', part):
-                        translatable_items.append({
-                            'file_path': file_path,
-                            'line_num': line_num,
-                            'value': part,
-                            'original_line': original_line,
-                            'type': 'csv_cell',
-                            'column_index': col_index
-                        })
-            
-            # 查找冒号分割的行（没有等号的情况）
-            elif ': ' in line:
-                parts = line.split(': ', 1)
-                if len(parts) == 2:
-                    key, value = parts
-                    value = value.strip()
-                    
-                    # 跳过空值、数字和科学计数法
-                    if (not value or 
-                        is_number_or_scientific(value) or
-                        len(value) < 2):
-                        continue
-                    
-                    # 跳过带有英文中括号的内容
-                    if '[' in value and ']' in value:
-                        continue
-                    
-                    # 只翻译包含字母的文本
-                    if re.search(r'[a-zA-Z]', value):
-                        translatable_items.append({
-                            'file_path': file_path,
-                            'line_num': line_num,
-                            'key': key.strip(),
-                            'value': value,
-                            'original_line': original_line,
-                            'type': 'colon_value'
-                        })
-            
             # 没有等号和冒号的行，直接翻译
             else:
-                # 跳过带有英文中括号的内容
-                if '[' in line and ']' in line:
+                # 跳过文件路径和带有英文中括号的内容
+                if _PATH_RE.match(line) or ('[' in line and ']' in line):
                     continue
                 
                 # 只翻译包含字母且长度合适的文本
-                if re.search(r'[a-zA-Z]', line) and len(line) >= 2:
+                if _ALPHA_RE.search(line) and len(line) >= 2:
                     translatable_items.append({
                         'file_path': file_path,
                         'line_num': line_num,
@@ -173,153 +164,297 @@ def extract_translatable_content(file_path):
                         'type': 'full_line'
                     })
     
+    return translatable_items
+
+def _detect_encoding(raw):
+    """根据 BOM 和试解码判断文件编码，返回 (解码后的文本, 编码)，无法识别时返回 (None, None)"""
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encodings = ['utf-16']
+    else:
+        encodings = ['utf-8', 'latin-1', 'cp1252']
+    
+    for encoding in encodings:
+        try:
+            return raw.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    
+    return None, None
+
+def _open_text(file_path):
+    """一次性读取并解码文件，返回可逐行迭代的文本流，无法识别编码时返回 None"""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    
+    encoding = _ENCODING_CACHE.get(file_path)
+    if encoding is None:
+        text, encoding = _detect_encoding(raw)
+        if text is None:
+            return None
+        _ENCODING_CACHE[file_path] = encoding
+    else:
+        text = raw.decode(encoding)
+    
+    # 与文本模式打开文件的行为一致，统一换行符为 \n
+    return io.StringIO(text, newline=None)
+
+def extract_translatable_content(file_path):
+    """提取文件中需要翻译的内容"""
+    try:
+        stream = _open_text(file_path)
+        
+        if stream is None:
+            print(f"⚠️ 无法读取文件 {file_path}，跳过")
+            return []
+        
+        # 直接逐行迭代文本流，不构建整个文件的行列表
+        with stream:
+            return _extract_from_lines(stream, file_path)
+    
     except Exception as e:
         print(f"❌ 处理文件 {file_path} 时出错: {e}")
     
-    return translatable_items
+    return []
 
-def translate_texts_in_blocks(texts, max_block_size=3000, max_retries=3):
-    """分块翻译文本列表，支持网络错误重试"""
-    translated_texts = []
-    
-    current_block = []
-    current_length = 0
-    block_count = 0
+def _extract_with_encoding(file_path):
+    """在子进程中提取文件内容，并把识别出的编码一起带回主进程"""
+    items = extract_translatable_content(file_path)
+    return items, _ENCODING_CACHE.get(file_path)
+
+def _extract_files_parallel(all_files):
+    """多进程并行提取所有文件的待翻译内容，结果顺序与 all_files 一致"""
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(_extract_with_encoding, all_files, chunksize=4))
+    
+    all_items = []
+    for file_path, (items, encoding) in zip(all_files, results):
+        # 子进程的编码缓存不会共享，写回主进程供更新文件时复用
+        if encoding:
+            _ENCODING_CACHE[file_path] = encoding
+        all_items.append(items)
+    
+    return all_items
+
+def _text_hash(text):
+    """计算文本的缓存键"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _open_translation_cache():
+    """打开翻译缓存数据库，失败时返回 None（本次不使用缓存）"""
+    try:
+        conn = sqlite3.connect(_CACHE_PATH)
+        conn.execute('CREATE TABLE IF NOT EXISTS translations (sha1 TEXT PRIMARY KEY, zh TEXT)')
+        return conn
+    except sqlite3.Error as e:
+        print(f"⚠️ 无法打开翻译缓存 {_CACHE_PATH}，本次不使用缓存: {e}")
+        return None
+
+def _load_cached_translations(conn, texts):
+    """批量查询缓存，返回 {原文: 译文}"""
+    text_by_hash = {_text_hash(text): text for text in texts}
+    hashes = list(text_by_hash)
+    cached = {}
+    
+    # SQLite 单条语句的参数个数有限，分批查询
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT sha1, zh FROM translations WHERE sha1 IN ({placeholders})', chunk)
+        for sha1, zh in rows:
+            cached[text_by_hash[sha1]] = zh
+    
+    return cached
+
+def _store_translations(conn, pairs):
+    """把新翻译的 (原文, 译文) 写入缓存"""
+    conn.executemany('INSERT OR REPLACE INTO translations (sha1, zh) VALUES (?, ?)',
+                     [(_text_hash(text), zh) for text, zh in pairs])
+    conn.commit()
+
+def _is_network_error(e):
+    """检查异常是否为可重试的网络相关错误（包括请求过于频繁）"""
+    if isinstance(e, TooManyRequests):
+        return True
+    return _NETWORK_ERROR_RE.search(str(e)) is not None
+
+def _wait_for_request_slot():
+    """按全局请求间隔排队，必要时等待，保证并发线程合计不超过接口的频率限制"""
+    global _next_request_time
+    with _rate_lock:
+        now = time.monotonic()
+        wait_time = max(0.0, _next_request_time - now)
+        _next_request_time = max(now, _next_request_time) + _MIN_REQUEST_INTERVAL
+    if wait_time > 0:
+        time.sleep(wait_time)
+
+def _get_translator():
+    """获取当前线程的翻译器实例，首次调用时创建"""
+    translator = getattr(_thread_local, 'translator', None)
+    if translator is None:
+        translator = GoogleTranslator(source='auto', target='zh-CN')
+        _thread_local.translator = translator
+    return translator
+
+def translate_texts_in_blocks(texts, max_block_size=4500, max_retries=3, max_workers=8):
+    """分块翻译文本列表，多个块并发请求（总请求频率受限），支持网络错误重试"""
     
-    def translate_block_with_retry(block_text, block_num, retry_count=0):
-        """带重试机制的块翻译函数"""
-        try:
-            translated_block = GoogleTranslator(source='auto', target='zh-CN').translate(block_text)
-            return translated_block
-        except Exception as e:
-            error_msg = str(e).lower()
-            # 检查是否为网络相关错误
-            if any(keyword in error_msg for keyword in ['network', 'connection', 'timeout', 'ssl', 'handshake', 'keyboardinterrupt']):
-                if retry_count < max_retries:
-                    wait_time = (retry_count + 1) * 2  # 递增等待时间
-                    print(f"⚠️ 第 {block_num} 块网络错误，{wait_time}秒后重试 (第{retry_count + 1}次重试): {e}")
-                    time.sleep(wait_time)
-                    return translate_block_with_retry(block_text, block_num, retry_count + 1)
-                else:
+    def translate_block_with_retry(block_text, block_num):
+        """带重试机制的块翻译函数，网络错误时按指数退避重试"""
+        for attempt in range(max_retries + 1):
+            try:
+                _wait_for_request_slot()
+                return _get_translator().translate(block_text)
+            except Exception as e:
+                if not _is_network_error(e):
+                    print(f"❌ 第 {block_num} 块翻译失败（非网络错误），使用原文: {e}")
+                    return None
+                if attempt == max_retries:
                     print(f"❌ 第 {block_num} 块重试{max_retries}次后仍失败，使用原文: {e}")
                     return None
-            else:
-                print(f"❌ 第 {block_num} 块翻译失败（非网络错误），使用原文: {e}")
-                return None
-    
-    for i, text in enumerate(texts):
-        # 如果加上当前文本会超出限制，先翻译当前块
-        if current_length + len(text) > max_block_size and current_block:
-            block_count += 1
-            progress = (i / len(texts)) * 100
-            print(f"🔄 翻译第 {block_count} 块 ({len(current_block)} 个文本, {current_length} 字符) - 进度: {progress:.1f}%")
-            
-            # 翻译当前块
-            block_text = "\n\n".join(current_block)
-            translated_block = translate_block_with_retry(block_text, block_count)
-            
-            if translated_block:
-                block_translations = translated_block.strip().split("\n\n")
-                
-                # 确保翻译结果数量匹配
-                while len(block_translations) < len(current_block):
-                    block_translations.append(current_block[len(block_translations)])
                 
-                translated_texts.extend(block_translations[:len(current_block)])
-                print(f"✅ 第 {block_count} 块翻译完成")
-            else:
-                # 翻译失败，使用原文
-                translated_texts.extend(current_block)
-            
-            # 重置当前块
-            current_block = []
-            current_length = 0
+                wait_time = min(30, 2 ** (attempt + 1))  # 指数退避：2、4、8…秒
+                print(f"⚠️ 第 {block_num} 块网络错误或请求过于频繁，{wait_time}秒后重试 (第{attempt + 1}次重试): {e}")
+                time.sleep(wait_time)
+    
+    def translate_parts(block, block_num):
+        """翻译一组文本，分隔符被译坏导致数量不符时对半拆分后分别重译"""
+        if len(block) == 1:
+            return [translate_block_with_retry(block[0], block_num) or None]
         
-        # 添加当前文本到块中
-        current_block.append(text)
-        current_length += len(text) + 2  # +2 for "\n\n"
-    
-    # 翻译最后一个块
-    if current_block:
-        block_count += 1
-        print(f"🔄 翻译第 {block_count} 块 ({len(current_block)} 个文本, {current_length} 字符) - 最后一块")
+        translated_block = translate_block_with_retry(_SEP.join(block), block_num)
+        if not translated_block:
+            return [None] * len(block)
         
-        block_text = "\n\n".join(current_block)
-        translated_block = translate_block_with_retry(block_text, block_count)
+        block_translations = [part.strip() for part in translated_block.split(_SEP.strip())]
+        if len(block_translations) == len(block):
+            return block_translations
         
-        if translated_block:
-            block_translations = translated_block.strip().split("\n\n")
-            
-            while len(block_translations) < len(current_block):
-                block_translations.append(current_block[len(block_translations)])
-            
-            translated_texts.extend(block_translations[:len(current_block)])
-            print(f"✅ 第 {block_count} 块翻译完成")
+        print(f"⚠️ 第 {block_num} 块译文数量不符 ({len(block_translations)}/{len(block)})，拆分后重新翻译")
+        mid = len(block) // 2
+        return translate_parts(block[:mid], block_num) + translate_parts(block[mid:], block_num)
+    
+    def translate_block(block_num, block):
+        """翻译单个块，返回与块内文本一一对应的译文列表，未能翻译的位置为 None"""
+        block_length = sum(len(text) + len(_SEP) for text in block)
+        print(f"🔄 翻译第 {block_num} 块 ({len(block)} 个文本, {block_length} 字符)")
+        
+        block_translations = translate_parts(block, block_num)
+        
+        if any(translated is not None for translated in block_translations):
+            print(f"✅ 第 {block_num} 块翻译完成")
+        return block_translations
+    
+    if not texts:
+        return []
+    
+    # 去重，并从本地缓存中取出已翻译过的文本
+    unique_texts = list(dict.fromkeys(texts))
+    if len(unique_texts) < len(texts):
+        print(f"🔁 去重：{len(texts)} 个文本中有 {len(unique_texts)} 个不重复，重复文本只翻译一次")
+    conn = _open_translation_cache()
+    translations = _load_cached_translations(conn, unique_texts) if conn else {}
+    misses = [text for text in unique_texts if text not in translations]
+    if translations:
+        print(f"💾 缓存命中 {len(translations)} 个文本，需要在线翻译 {len(misses)} 个")
+    
+    # 按长度从大到小装箱（首次适应递减），尽量减少块数，也就是请求次数
+    blocks = []
+    remaining = []
+    
+    for text in sorted(misses, key=len, reverse=True):
+        size = len(text) + len(_SEP)
+        
+        # 单个文本就超出限制时，单独成块
+        if size > max_block_size:
+            print(f"⚠️ 文本长度 {len(text)} 超出单块上限 {max_block_size}，单独翻译: {text[:30]}...")
+            blocks.append([text])
+            remaining.append(0)
+            continue
+        
+        for i, room in enumerate(remaining):
+            if room >= size:
+                blocks[i].append(text)
+                remaining[i] -= size
+                break
         else:
-            # 翻译失败，使用原文
-            translated_texts.extend(current_block)
-    
-    if block_count > 0:
-        print(f"🎉 所有 {block_count} 个块翻译完成！")
+            blocks.append([text])
+            remaining.append(max_block_size - size)
+    
+    new_translations = []
+    if blocks:
+        # 翻译请求以网络等待为主，用线程池让多个块同时在途
+        print(f"📦 共 {len(blocks)} 块，最多 {max_workers} 块并发翻译")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(translate_block, range(1, len(blocks) + 1), blocks)
+            for block, block_translations in zip(blocks, results):
+                for text, translated in zip(block, block_translations):
+                    if translated is None:
+                        # 翻译失败，使用原文，且不写入缓存
+                        translations[text] = text
+                    else:
+                        translations[text] = translated
+                        new_translations.append((text, translated))
+        
+        print(f"🎉 所有 {len(blocks)} 个块翻译完成！")
     
-    return translated_texts
+    if conn:
+        try:
+            if new_translations:
+                _store_translations(conn, new_translations)
+        except sqlite3.Error as e:
+            print(f"⚠️ 写入翻译缓存失败: {e}")
+        finally:
+            conn.close()
+    
+    # 按原顺序展开（包括重复文本）
+    return [translations[text] for text in texts]
 
 def update_file_with_translations(file_path, updates):
     """用翻译结果更新文件"""
     try:
-        # 读取原文件
-        encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252']
-        content = None
-        used_encoding = None
+        # 读取原文件（优先复用分析阶段识别出的编码）
+        stream = _open_text(file_path)
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.readlines()
-                used_encoding = encoding
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if content is None:
+        if stream is None:
             print(f"❌ 无法读取文件 {file_path}")
             return
         
-        # 应用翻译
+        # 写回时需要按行号索引，这里才构建行列表
+        with stream:
+            content = stream.readlines()
+        
+        # 预先生成每个需要替换的行
+        new_lines = {}
+        csv_parts = {}
         for update in updates:
             line_num = update['line_num']
             translated_value = update['translated_value']
             update_type = update['type']
             
-            if line_num < len(content):
-                if update_type == 'key_value':
-                    # 键值对格式
-                    key = update['key']
-                    new_line = f"{key}={translated_value}\n"
-                elif update_type == 'colon_value':
-                    # 冒号分割格式
-                    key = update['key']
-                    new_line = f"{key}: {translated_value}\n"
-                elif update_type == 'csv_cell':
-                    # CSV格式，需要替换特定列
-                    original_line = update['original_line']
-                    parts = original_line.strip().split(';')
-                    col_index = update['column_index']
-                    if col_index < len(parts):
-                        parts[col_index] = translated_value
-                    new_line = ';'.join(parts) + '\n'
-                elif update_type == 'full_line':
-                    # 整行翻译
-                    new_line = f"{translated_value}\n"
-                
-                content[line_num] = new_line
+            if update_type == 'key_value':
+                # 键值对格式
+                new_lines[line_num] = f"{update['key']}={translated_value}\n"
+            elif update_type == 'colon_value':
+                # 冒号分割格式
+                new_lines[line_num] = f"{update['key']}: {translated_value}\n"
+            elif update_type == 'csv_cell':
+                # CSV格式，需要替换特定列；同一行的多个单元格在同一份拆分结果上依次替换
+                parts = csv_parts.setdefault(line_num, update['original_line'].strip().split(';'))
+                col_index = update['column_index']
+                if col_index < len(parts):
+                    parts[col_index] = translated_value
+                new_lines[line_num] = ';'.join(parts) + '\n'
+            elif update_type == 'full_line':
+                # 整行翻译
+                new_lines[line_num] = f"{translated_value}\n"
         
         # 写入翻译后的文件
         output_file = file_path.replace('.dat', '_translated.dat').replace('.txt', '_translated.txt')
         
         # 强制使用UTF-8编码保存翻译后的文件，避免中文字符编码问题
+        # 拼接成完整文本后一次写入
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.writelines(content)
+            f.write(''.join(new_lines.get(i, line) for i, line in enumerate(content)))
         
         print(f"✅ 已更新文件: {output_file} ({len(updates)} 个翻译项)")
         
@@ -328,20 +463,26 @@ def update_file_with_translations(file_path, updates):
 
 
 
+def _list_target_files(file_pattern=None):
+    """一次扫描当前目录，列出待处理的.dat和.txt文件（排除已翻译的文件），匹配规则与原先的 glob 一致"""
+    exclude = ('_translated.dat', '_translated.txt')
+    # 与 glob.glob(f"*{file_pattern}*.dat") 等价：模式只匹配扩展名之前的部分；
+    # fnmatch 会像 glob 一样做 os.path.normcase，在 Windows 上不区分大小写
+    name_patterns = [f"*{file_pattern or ''}*{ext}" for ext in ('.dat', '.txt')]
+    with os.scandir('.') as entries:
+        files = [entry.name for entry in entries
+                 if entry.is_file()
+                 and not entry.name.startswith('.')
+                 and not entry.name.endswith(exclude)
+                 and any(fnmatch.fnmatch(entry.name, pattern) for pattern in name_patterns)]
+    
+    # 排序，保证 --start-index 在多次运行间指向同一批文件
+    return sorted(files)
+
 def process_files_batch(file_pattern=None, max_files=None, start_index=0):
     """分批处理文件"""
     # 获取所有.dat和.txt文件
-    if file_pattern:
-        dat_files = glob.glob(f"*{file_pattern}*.dat")
-        txt_files = glob.glob(f"*{file_pattern}*.txt")
-    else:
-        dat_files = glob.glob("*.dat")
-        txt_files = glob.glob("*.txt")
-    
-    all_files = dat_files + txt_files
-    
-    # 排除已翻译的文件
-    all_files = [f for f in all_files if not f.endswith('_translated.dat') and not f.endswith('_translated.txt')]
+    all_files = _list_target_files(file_pattern)
     
     if start_index > 0:
         all_files = all_files[start_index:]
@@ -359,9 +500,8 @@ def process_files_batch(file_pattern=None, max_files=None, start_index=0):
     files_with_content = []
     files_without_content = []
     
-    for file_path in all_files:
+    for file_path, items in zip(all_files, _extract_files_parallel(all_files)):
         print(f"📖 分析文件: {file_path}")
-        items = extract_translatable_content(file_path)
         if items:
             files_with_content.append((file_path, items))
             print(f"   找到 {len(items)} 个待翻译项")
@@ -382,30 +522,31 @@ def process_files_batch(file_pattern=None, max_files=None, start_index=0):
         print("❌ 未找到任何需要翻译的内容")
         return
     
-    # 处理有内容的文件
+    # 汇总所有文件的待翻译文本一起分块翻译，小文件不再各自单独发起请求
+    all_items = [item for _, items in files_with_content for item in items]
+    print(f"\n🔄 开始翻译 {len(files_with_content)} 个文件中的 {len(all_items)} 个项目")
+    
+    translated_texts = translate_texts_in_blocks([item['value'] for item in all_items])
+    
+    # 确保翻译结果数量匹配
+    if len(translated_texts) != len(all_items):
+        print("⚠️ 警告：翻译结果数量与原文不符！")
+        # 用原文补齐
+        while len(translated_texts) < len(all_items):
+            translated_texts.append(all_items[len(translated_texts)]['value'])
+    
+    for item, translated in zip(all_items, translated_texts):
+        item['translated_value'] = translated
+    
+    # 按文件写回翻译结果
     for file_path, items in files_with_content:
-        print(f"\n🔄 开始翻译文件: {file_path} ({len(items)} 个项目)")
-        
-        # 提取所有需要翻译的文本
-        texts_to_translate = [item['value'] for item in items]
-        
-        # 分块翻译
-        translated_texts = translate_texts_in_blocks(texts_to_translate)
-        
-        # 确保翻译结果数量匹配
-        if len(translated_texts) != len(items):
-            print("⚠️ 警告：翻译结果数量与原文不符！")
-            # 用原文补齐
-            while len(translated_texts) < len(items):
-                translated_texts.append(items[len(translated_texts)]['value'])
-        
         # 准备更新数据
         updates = []
-        for i, item in enumerate(items):
+        for item in items:
             update_item = {
                 'line_num': item['line_num'],
                 'original_value': item['value'],
-                'translated_value': translated_texts[i],
+                'translated_value': item['translated_value'],
                 'original_line': item['original_line'],
                 'type': item['type']
             }
@@ -449,17 +590,7 @@ def main():
 def analyze_files_only(file_pattern=None, max_files=None, start_index=0):
     """仅分析文件，不进行翻译"""
     # 获取所有.dat和.txt文件
-    if file_pattern:
-        dat_files = glob.glob(f"*{file_pattern}*.dat")
-        txt_files = glob.glob(f"*{file_pattern}*.txt")
-    else:
-        dat_files = glob.glob("*.dat")
-        txt_files = glob.glob("*.txt")
-    
-    all_files = dat_files + txt_files
-    
-    # 排除已翻译的文件
-    all_files = [f for f in all_files if not f.endswith('_translated.dat') and not f.endswith('_translated.txt')]
+    all_files = _list_target_files(file_pattern)
     
     if start_index > 0:
         all_files = all_files[start_index:]
@@ -477,9 +608,8 @@ def analyze_files_only(file_pattern=None, max_files=None, start_index=0):
     files_with_content = []
     files_without_content = []
     
-    for file_path in all_files:
+    for file_path, items in zip(all_files, _extract_files_parallel(all_files)):
         print(f"📖 分析文件: {file_path}")
-        items = extract_translatable_content(file_path)
         if items:
             files_with_content.append((file_path, items))
             print(f"   找到 {len(items)} 个待翻译项")